@@ -4,6 +4,7 @@ from query import (
     show_all_query,
 )
 from dashboard import dashboard 
+from profiler import profile_rerun
 def main():
     """
     Main entry point for the Streamlit Client Query Management System (CQMS) app.
@@ -22,6 +23,7 @@ def main():
     - logged_in: Tracks login status.
     - role: Stores the user's role (e.g., "Client").
     - username, password: Stores login credentials.
+    - profile_rerun: Support-only toggle that profiles each rerun (see profiler.py).
     Sidebar navigation options:
     - Dashboard
     - Querys
@@ -45,27 +47,30 @@ def main():
             menu_options = ["Querys", "Logout"]
         # menu_options = ["Dashboard", "Querys", "Logout"]
         selected_option = st.sidebar.radio("Navigate", menu_options)
+        if st.session_state.role == "Support":
+            st.sidebar.checkbox("🧪 Profile this rerun", key="profile_rerun")
         # Page routing logic
-        if selected_option == "Dashboard":
-            st.markdown("<h4 style='font-size:1em;'>📊 Client Query Management Dashboard</h4>", unsafe_allow_html=True)  # Smaller header
-            dashboard()
-        elif selected_option == "Querys":
-            if st.session_state.role == "Client":
-                st.markdown("<h4 style='font-size:1em;'>📋 My Querys</h4>", unsafe_allow_html=True)
-                show_all_query()
-            else:
-                st.markdown("<h4 style='font-size:1em;'>📋 All Querys</h4>", unsafe_allow_html=True)
-                show_all_query()
-        elif selected_option == "Logout":
-            st.session_state.logged_in = False
-            st.session_state.username = ""
-            st.session_state.password = ""
-            st.session_state.role = ""
-            st.session_state.addClient = False
-            st.session_state.user_id = None
-            st.session_state.show_registration = False
-            st.success("You have been logged out.")
-            st.rerun()
+        with profile_rerun(selected_option, st.session_state.role):
+            if selected_option == "Dashboard":
+                st.markdown("<h4 style='font-size:1em;'>📊 Client Query Management Dashboard</h4>", unsafe_allow_html=True)  # Smaller header
+                dashboard()
+            elif selected_option == "Querys":
+                if st.session_state.role == "Client":
+                    st.markdown("<h4 style='font-size:1em;'>📋 My Querys</h4>", unsafe_allow_html=True)
+                    show_all_query()
+                else:
+                    st.markdown("<h4 style='font-size:1em;'>📋 All Querys</h4>", unsafe_allow_html=True)
+                    show_all_query()
+            elif selected_option == "Logout":
+                st.session_state.logged_in = False
+                st.session_state.username = ""
+                st.session_state.password = ""
+                st.session_state.role = ""
+                st.session_state.addClient = False
+                st.session_state.user_id = None
+                st.session_state.show_registration = False
+                st.success("You have been logged out.")
+                st.rerun()
     else:
         # Show login page or message
         st.title("Please log in to continue.")
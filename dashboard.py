@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
 from query import show_all_data
+from query_type import get_query_type_counts
 import random
 
 def dashboard():
@@ -12,7 +13,7 @@ def dashboard():
     Displays an interactive dashboard for client queries using Streamlit.
     The dashboard includes:
     - A line chart showing the average resolution time (in days) of closed queries over time.
-    - A bar chart displaying the frequency of different query types.
+    - A bar chart displaying the frequency of different query types, counted in SQL on the query_type_id key.
     - A pie chart illustrating the distribution of query statuses.
     Data is retrieved via `show_all_data()` and processed into a pandas DataFrame.
     Missing values are filled with zero, and resolution times are calculated for closed queries.
@@ -52,8 +53,10 @@ def dashboard():
 
     # Bar chart: Query type frequency
     # st.subheader("📊 Query Type Frequency")
-    type_counts = df['query_heading'].value_counts().reset_index()
-    type_counts.columns = ['Query Type', 'Count']
+    type_counts = pd.DataFrame(
+        get_query_type_counts(st.session_state.user_id if st.session_state.role == "Client" else None),
+        columns=['Query Type', 'Count']
+    )
 
     fig2, ax2 = plt.subplots()
     sns.barplot(data=type_counts, x='Query Type', y='Count', ax=ax2)
@@ -0,0 +1,129 @@
+import cProfile
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import streamlit as st
+
+PROFILE_ENV_VAR = "CQMS_PROFILE"
+PROFILE_DIR = os.environ.get("CQMS_PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("CQMS_PROFILE_KEEP", "50"))
+
+# Streamlit runs each session's rerun in its own thread, so tags are kept per thread
+_local = threading.local()
+# cProfile can only run one profiler at a time, so only one rerun is captured at once
+_profile_lock = threading.Lock()
+
+def profiling_enabled():
+    """
+    Checks whether the current rerun should be profiled.
+
+    Profiling is turned on either by setting the CQMS_PROFILE environment variable
+    to a non-empty value other than "0", or by the Support-only "Profile this rerun"
+    toggle stored in the session state.
+
+    Returns:
+        bool: True if the rerun should be profiled, False otherwise.
+    """
+    if os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0"):
+        return True
+    return bool(st.session_state.get("profile_rerun", False))
+
+def tag_profile(key, value):
+    """
+    Attaches a tag (e.g. a row count) to the profile of the current rerun.
+
+    Does nothing when no profile is being captured, so pages can call it unconditionally.
+
+    Args:
+        key (str): The tag name, e.g. "query_rows".
+        value: A JSON-serialisable value for the tag.
+    """
+    tags = getattr(_local, "tags", None)
+    if tags is not None:
+        tags[key] = value
+
+@contextmanager
+def profile_rerun(page, role):
+    """
+    Wraps a single Streamlit rerun in a cProfile profiler when profiling is enabled.
+
+    The profile is written to PROFILE_DIR in the standard pstats format (.prof), which
+    flamegraph tools such as snakeviz, flameprof and tuna can read. A JSON file with the
+    same name holds the page, role and any tags recorded via tag_profile().
+    Only the newest PROFILE_KEEP profiles are kept. When profiling is disabled the
+    context manager only performs a single flag check. If another rerun is already
+    being profiled, this rerun runs without a profile. Failures while capturing or
+    writing the profile are printed and never break the page.
+
+    Args:
+        page (str): The page being rendered (e.g. "Dashboard").
+        role (str): The role of the logged in user.
+    """
+    if not profiling_enabled():
+        yield
+        return
+    if not _profile_lock.acquire(blocking=False):
+        print(f"Skipping profile of {page}: another rerun is being profiled")
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        started = datetime.now()
+        profiler.enable()
+    except ValueError as e:
+        # Another profiler (e.g. an external one) is already active
+        _profile_lock.release()
+        print(f"Skipping profile of {page}: {e}")
+        yield
+        return
+    _local.tags = {"page": page, "role": role}
+    try:
+        yield
+    finally:
+        # st.rerun() raises to restart the script, so the profile is written here
+        try:
+            profiler.disable()
+            tags = _local.tags
+            tags["started"] = started.isoformat()
+            tags["duration_ms"] = round((datetime.now() - started).total_seconds() * 1000, 1)
+            write_profile(profiler, tags)
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+        finally:
+            _local.tags = None
+            _profile_lock.release()
+
+def write_profile(profiler, tags):
+    """
+    Writes a profile and its tags to PROFILE_DIR and rotates old profiles out.
+
+    Args:
+        profiler (cProfile.Profile): The finished profiler.
+        tags (dict): The tags describing the profiled rerun.
+
+    Returns:
+        str: The path of the written .prof file.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", f"{tags['page']}_{tags['role']}").strip("-")
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{slug}"
+    path = os.path.join(PROFILE_DIR, name + ".prof")
+    profiler.dump_stats(path)
+    with open(os.path.join(PROFILE_DIR, name + ".json"), "w") as f:
+        json.dump(tags, f, indent=2, default=str)
+    rotate_profiles()
+    return path
+
+def rotate_profiles():
+    """
+    Deletes the oldest profiles (and their tag files) beyond PROFILE_KEEP.
+    """
+    profiles = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith(".prof"))
+    for old in profiles[:max(len(profiles) - PROFILE_KEEP, 0)]:
+        base = os.path.join(PROFILE_DIR, old[:-len(".prof")])
+        for ext in (".prof", ".json"):
+            if os.path.exists(base + ext):
+                os.remove(base + ext)
@@ -2,9 +2,11 @@ import streamlit as st
 import pandas as pd
 import re
 from db import get_connection
+from profiler import tag_profile
+from query_type import get_query_type_id, get_query_types
 from st_aggrid import AgGrid, GridOptionsBuilder
 
-def show_query_list_page():
+def show_query_list_page(query_type_id=None):
     """
     Fetches and returns a list of client queries from the database.
 
@@ -12,6 +14,9 @@ def show_query_list_page():
     - All queries (for non-client roles)
     - Only the queries associated with the current client user (for "Client" role)
 
+    Args:
+        query_type_id (int, optional): Only return queries of this query type. Returns all query types if None.
+
     Returns:
         list: A list of tuples containing query details (query_id, emailid, mobilenumber, query_heading, query_description, status).
               Returns an empty list if an error occurs during database access.
@@ -23,13 +28,19 @@ def show_query_list_page():
         conn = get_connection()
         cursor = conn.cursor()
 
+        conditions, params = [], []
         if st.session_state.role == "Client":
             print("Fetching queries for user_id:", st.session_state.role, st.session_state.user_id)
-            cursor.execute("SELECT query_id,emailid, mobilenumber, query_heading, query_description, status FROM client_query_details WHERE user_id = %s order by query_id desc", (st.session_state.user_id,))
-        else:
-            cursor.execute("SELECT query_id, emailid, mobilenumber, query_heading, query_description, status FROM client_query_details order by query_id desc")
+            conditions.append("user_id = %s")
+            params.append(st.session_state.user_id)
+        if query_type_id is not None:
+            conditions.append("query_type_id = %s")
+            params.append(query_type_id)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        cursor.execute("SELECT query_id, emailid, mobilenumber, query_heading, query_description, status FROM client_query_details" + where + " order by query_id desc", tuple(params))
         rows = cursor.fetchall()
         conn.close()
+        tag_profile("query_list_rows", len(rows))
         return rows
     except Exception as e:
         st.error(f"Error fetching query list: {e}")
@@ -81,18 +92,23 @@ def show_all_query():
     Displays the main query management interface for clients.
     - If the 'addClient' flag is set in the session state, shows the add client query page.
     - If a query is selected, displays the details for the selected query.
-    - Otherwise, shows a list of all queries in a selectable dataframe.
+    - Otherwise, shows a list of all queries in a selectable dataframe, filtered by the selected query type.
     - If no queries are found, displays an informational message.
     - For users with the 'Client' role, provides a button to add a new client query.
     Relies on Streamlit session state for navigation and user role management.
     """
     if st.session_state.get("addClient", False):
+        tag_profile("subpage", "Add Query")
         show_add_client_page()
         return
     if st.session_state.get("selected_query_id"):
         show_query_details_page(st.session_state.selected_query_id)
         return
-    rows = show_query_list_page()
+    # Clients only see the query types of their own queries
+    query_types = get_query_types(st.session_state.user_id if st.session_state.role == "Client" else None)
+    type_options = {"All": None, **{label: query_type_id for query_type_id, label in query_types.items()}}
+    selected_type = st.selectbox("Query Type", list(type_options))
+    rows = show_query_list_page(type_options[selected_type])
     df = pd.DataFrame(rows, columns=["Query ID", "Email ID", "Mobile Number", "Query Heading", "Query Description", "Status"])
     if not df.empty:
         show_selectable_dataframe(df)
@@ -133,7 +149,9 @@ def show_query_details_page(query_id):
         cursor.execute("SELECT query_id, emailid, mobilenumber, query_heading, query_description, status, screenshot FROM client_query_details WHERE query_id = %s", (query_id,))
         result = cursor.fetchone()
         conn.close()
+        tag_profile("subpage", "Query Details")
         if result:
+            tag_profile("screenshot_bytes", len(result[6]) if result[6] else 0)
             st.title("📋Update Client Query Page")
             with st.form("update_client_form"):
                 emailid = st.text_input("Email ID", value=result[1], disabled=True)
@@ -206,7 +224,8 @@ def show_add_client_page():
     Features:
         - Validates that all fields are filled.
         - Validates the email format.
-        - Inserts the query into the 'client_query_details' database table with status 'Open' and the current user's ID.
+        - Inserts the query into the 'client_query_details' database table with status 'Open', the current user's ID
+          and the query_type_id of the canonicalised query heading.
         - Displays success or error messages based on the outcome.
         - Provides a button to return to the "My Queries" page.
     Exceptions:
@@ -234,12 +253,14 @@ def show_add_client_page():
             else:
                 try:
                     conn = get_connection()
+                    # Assign the query type on the same connection so both writes commit together
+                    query_type_id = get_query_type_id(query_heading, conn)
                     cursor = conn.cursor()
                     screenshot_bytes = screenshot.read() if screenshot else None
                     cursor.execute("""
-                        INSERT INTO client_query_details (emailid, mobilenumber, query_heading, query_description, status, user_id, screenshot)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (emailid, mobile_number, query_heading, query_description, 'Open', st.session_state.user_id, screenshot_bytes))
+                        INSERT INTO client_query_details (emailid, mobilenumber, query_heading, query_description, status, user_id, screenshot, query_type_id)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    """, (emailid, mobile_number, query_heading, query_description, 'Open', st.session_state.user_id, screenshot_bytes, query_type_id))
                     conn.commit()
                     conn.close()
                     st.success("Client query added successfully!")
@@ -269,6 +290,7 @@ def show_all_data():
             cursor.execute("SELECT query_id, emailid, mobilenumber, query_heading, query_description, query_created_time, status, query_closed_time FROM client_query_details order by query_created_time desc")
         rows = cursor.fetchall()
         conn.close()
+        tag_profile("all_data_rows", len(rows))
         return rows
     except Exception as e:
         st.error(f"Error fetching all data: {e}")
@@ -0,0 +1,293 @@
+import re
+import sys
+from db import get_connection
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Quotes (and spaces) stripped from both ends of a heading by canonicalize_query_type()
+_QUOTES = "\"'`“”‘’ "
+
+# Canonical query type name -> query_type_id, shared by every rerun in this process
+_query_type_cache = {}
+
+def canonicalize_query_type(heading):
+    """
+    Normalises a free-text query heading into its canonical query type name.
+
+    Collapses whitespace, drops surrounding quotes and trailing sentence punctuation
+    (. ! ? , ; :) and folds case, so that "Login Issue", " login  issue" and
+    "LOGIN ISSUE!" all map to "login issue". Symbols that are part of the name are
+    kept, so "C++", "C#" and ".NET error" stay distinct query types.
+    Typos are not corrected here; they are folded into a query type through the
+    query_type_alias table (see merge_query_type()).
+
+    Args:
+        heading (str): The query heading entered by the client.
+
+    Returns:
+        str: The canonical query type name.
+    """
+    name = " ".join(str(heading).split()).casefold()
+    canonical = re.sub(r"[.!?,;:]+$", "", name.strip(_QUOTES)).strip(_QUOTES)
+    return canonical or name
+
+def get_query_type_id(heading, conn=None):
+    """
+    Returns the query_type_id for a query heading, creating the query type if needed.
+
+    Looks the canonical name up in the in-process cache first, then in the
+    query_type_alias table (so merged names win) and the query_type table, and
+    only inserts a new query type if neither has it.
+    Uses the given connection if one is passed (without committing or closing it),
+    otherwise opens and commits its own. Newly inserted ids are not cached until they
+    are read back on a later call, so a rolled back insert never leaves a stale id behind.
+
+    Args:
+        heading (str): The query heading entered by the client.
+        conn (mysql.connector.connection.MySQLConnection, optional): An open connection.
+
+    Returns:
+        int: The query_type_id of the canonical query type.
+
+    Raises:
+        Any database exception is raised to the caller so the insert can be aborted.
+    """
+    name = canonicalize_query_type(heading)
+    if name in _query_type_cache:
+        return _query_type_cache[name]
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COALESCE(
+                (SELECT query_type_id FROM query_type_alias WHERE name = %s),
+                (SELECT query_type_id FROM query_type WHERE name = %s)
+            )
+        """, (name, name))
+        result = cursor.fetchone()
+        if result and result[0] is not None:
+            _query_type_cache[name] = result[0]
+            return result[0]
+        # Only a concurrent insert of the same name can hit the duplicate key here;
+        # LAST_INSERT_ID(expr) then makes lastrowid return the existing id
+        cursor.execute("""
+            INSERT INTO query_type (name, label) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE query_type_id = LAST_INSERT_ID(query_type_id)
+        """, (name, " ".join(str(heading).split())))
+        query_type_id = cursor.lastrowid
+        if own_conn:
+            conn.commit()
+        return query_type_id
+    finally:
+        if own_conn:
+            conn.close()
+
+def get_query_types(user_id=None):
+    """
+    Fetches query types for grouping and filtering.
+
+    Args:
+        user_id (int, optional): Only return query types used by this user's queries.
+            Clients must pass their user ID so they never see other clients' headings.
+
+    Returns:
+        dict: A mapping of query_type_id to its display label. Returns an empty dict if an error occurs.
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        if user_id is not None:
+            cursor.execute("""
+                SELECT DISTINCT qt.query_type_id, qt.label
+                FROM query_type qt JOIN client_query_details c USING (query_type_id)
+                WHERE c.user_id = %s ORDER BY qt.label
+            """, (user_id,))
+        else:
+            # Query types merged into another one via an alias are left out
+            cursor.execute("""
+                SELECT query_type_id, label FROM query_type
+                WHERE name NOT IN (SELECT name FROM query_type_alias) ORDER BY label
+            """)
+        rows = cursor.fetchall()
+        conn.close()
+        return dict(rows)
+    except Exception as e:
+        print(f"Error fetching query types: {e}")
+        return {}
+
+def get_query_type_counts(user_id=None):
+    """
+    Counts client queries per query type with a GROUP BY on the indexed query_type_id.
+
+    Queries filed under a merged query type are counted under the type its alias points
+    to, and queries that are not backfilled yet are counted together as "Uncategorised".
+
+    Args:
+        user_id (int, optional): Only count this user's queries.
+
+    Returns:
+        list: A list of (label, count) tuples, largest count first. Returns an empty list if an error occurs.
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        where = "WHERE c.user_id = %s" if user_id is not None else ""
+        cursor.execute(f"""
+            SELECT COALESCE(MAX(t.label), 'Uncategorised'), COUNT(*)
+            FROM client_query_details c
+            LEFT JOIN query_type qt ON qt.query_type_id = c.query_type_id
+            LEFT JOIN query_type_alias a ON a.name = qt.name
+            LEFT JOIN query_type t ON t.query_type_id = COALESCE(a.query_type_id, qt.query_type_id)
+            {where}
+            GROUP BY t.query_type_id
+            ORDER BY COUNT(*) DESC
+        """, (user_id,) if user_id is not None else ())
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    except Exception as e:
+        print(f"Error counting query types: {e}")
+        return []
+
+def create_query_type_schema(conn):
+    """
+    Creates the query_type and query_type_alias tables and the indexed query_type_id
+    foreign key on client_query_details if they do not exist yet.
+
+    Args:
+        conn (mysql.connector.connection.MySQLConnection): An open connection.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS query_type (
+            query_type_id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL UNIQUE,
+            label VARCHAR(255) NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS query_type_alias (
+            name VARCHAR(255) NOT NULL PRIMARY KEY,
+            query_type_id INT UNSIGNED NOT NULL,
+            FOREIGN KEY (query_type_id) REFERENCES query_type (query_type_id)
+        )
+    """)
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'client_query_details' AND COLUMN_NAME = 'query_type_id'
+    """)
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("""
+            ALTER TABLE client_query_details
+            ADD COLUMN query_type_id INT UNSIGNED NULL,
+            ADD INDEX idx_client_query_details_query_type_id (query_type_id),
+            ADD CONSTRAINT fk_client_query_details_query_type
+                FOREIGN KEY (query_type_id) REFERENCES query_type (query_type_id)
+        """)
+    conn.commit()
+
+def backfill_query_types():
+    """
+    Assigns a query_type_id to every existing client query that does not have one.
+
+    Creates the schema if needed, then walks client_query_details in query_id order,
+    BACKFILL_BATCH_SIZE rows at a time, updating each row by primary key and committing
+    after every batch so no lock is held for the whole table. Safe to run repeatedly.
+
+    Returns:
+        int: The number of client queries updated.
+    """
+    conn = get_connection()
+    try:
+        create_query_type_schema(conn)
+        cursor = conn.cursor()
+        updated = 0
+        last_query_id = 0
+        while True:
+            cursor.execute("""
+                SELECT query_id, query_heading FROM client_query_details
+                WHERE query_id > %s AND query_type_id IS NULL
+                ORDER BY query_id LIMIT %s
+            """, (last_query_id, BACKFILL_BATCH_SIZE))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_query_id = rows[-1][0]
+            updates = [(get_query_type_id(heading, conn), query_id) for query_id, heading in rows if heading is not None]
+            if updates:
+                cursor.executemany("UPDATE client_query_details SET query_type_id = %s WHERE query_id = %s", updates)
+                updated += len(updates)
+            conn.commit()
+        return updated
+    finally:
+        conn.close()
+
+def merge_query_type(alias_heading, target_heading):
+    """
+    Folds a misspelt or variant heading into an existing query type.
+
+    The target is resolved through query_type_alias first, so merging into a name that
+    was itself merged earlier lands on the query type it now points to. Records the
+    alias in query_type_alias, so future inserts and backfills map it to the target
+    query type, and moves any client queries and aliases filed under the alias's own
+    query type over to the target, all in one transaction. The old query type row is
+    kept so that app processes still holding it in their cache can keep inserting;
+    restart the app to pick up the merge everywhere.
+
+    Args:
+        alias_heading (str): The variant heading, e.g. "Loign Issue".
+        target_heading (str): A heading of the query type to merge into, e.g. "Login Issue".
+
+    Returns:
+        int: The number of client queries moved to the target query type.
+
+    Raises:
+        ValueError: If the target is unknown or is the same query type as the alias.
+    """
+    alias = canonicalize_query_type(alias_heading)
+    target = canonicalize_query_type(target_heading)
+    if alias == target:
+        raise ValueError(f"'{alias_heading}' and '{target_heading}' are already the same query type")
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COALESCE(
+                (SELECT query_type_id FROM query_type_alias WHERE name = %s),
+                (SELECT query_type_id FROM query_type WHERE name = %s)
+            )
+        """, (target, target))
+        target_id = cursor.fetchone()[0]
+        if target_id is None:
+            raise ValueError(f"Unknown query type: {target_heading}")
+        cursor.execute("SELECT query_type_id FROM query_type WHERE name = %s", (alias,))
+        result = cursor.fetchone()
+        alias_id = result[0] if result else None
+        if alias_id == target_id:
+            raise ValueError(f"'{target_heading}' is already merged into '{alias_heading}'")
+        cursor.execute("""
+            INSERT INTO query_type_alias (name, query_type_id) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE query_type_id = VALUES(query_type_id)
+        """, (alias, target_id))
+        moved = 0
+        if alias_id is not None:
+            # Names merged into the alias earlier now follow it to the target
+            cursor.execute("UPDATE query_type_alias SET query_type_id = %s WHERE query_type_id = %s", (target_id, alias_id))
+            cursor.execute("UPDATE client_query_details SET query_type_id = %s WHERE query_type_id = %s", (target_id, alias_id))
+            moved = cursor.rowcount
+        conn.commit()
+        for name, query_type_id in list(_query_type_cache.items()):
+            if query_type_id == alias_id:
+                _query_type_cache[name] = target_id
+        _query_type_cache[alias] = target_id
+        return moved
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "merge":
+        print(f"Moved {merge_query_type(sys.argv[2], sys.argv[3])} client queries to '{sys.argv[3]}'.")
+    else:
+        print(f"Backfilled query_type_id for {backfill_query_types()} client queries.")